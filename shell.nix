@@ -3,6 +3,6 @@ pkgs.mkShell {
   buildInputs = [
     pkgs.python312
     pkgs.python312Packages.numpy
-    pkgs.python312Packages.scikit-learn
+    pkgs.python312Packages.scipy
   ];
 }
\ No newline at end of file
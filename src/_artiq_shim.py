@@ -0,0 +1,58 @@
+"""Single import point for ARTIQ names, with inert stand-ins on non-ARTIQ hosts."""
+
+from __future__ import annotations
+
+try:
+    from artiq.coredevice.sampler import adc_mu_to_volt
+    from artiq.coredevice.suservo import T_CYCLE as SUSERVO_T_CYCLE
+    from artiq.experiment import EnumerationValue, EnvExperiment, NumberValue, delay_mu, kernel, portable, MHz, ms, us
+    from artiq.experiment import TBool, TFloat, TList
+
+    ARTIQ_AVAILABLE = True
+    ARTIQ_IMPORT_ERROR = None
+except Exception as exc:  # pragma: no cover - allows import on non-ARTIQ hosts
+    ARTIQ_AVAILABLE = False
+    ARTIQ_IMPORT_ERROR = exc
+
+    class EnvExperiment:  # type: ignore[override]
+        # Experiment modules still import (e.g. for the BO core or tooling),
+        # but an experiment can only be instantiated with ARTIQ installed.
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError(
+                "ARTIQ is not available in this Python environment. "
+                f"Import error: {ARTIQ_IMPORT_ERROR}"
+            )
+
+    class NumberValue:  # type: ignore[override]
+        def __init__(self, *args, **kwargs):
+            pass
+
+    class EnumerationValue:  # type: ignore[override]
+        def __init__(self, *args, **kwargs):
+            pass
+
+    def kernel(func):  # type: ignore[override]
+        return func
+
+    def portable(func):  # type: ignore[override]
+        return func
+
+    def delay_mu(_):  # type: ignore[override]
+        return None
+
+    # Kernel type annotations are only interpreted by the ARTIQ compiler.
+    TBool = bool
+    TFloat = float
+
+    def TList(_):  # type: ignore[override]
+        return list
+
+    def adc_mu_to_volt(data, gain=0, corrected_fs=True):  # type: ignore[override]
+        full_scale = 20.48 if corrected_fs else 20.0
+        return data * full_scale / (10**gain * (1 << 16))
+
+    # ADC sampling period of the SUServo gateware.
+    SUSERVO_T_CYCLE = (2 * (8 + 64) + 2) * 8e-9
+    MHz = 1e6
+    ms = 1e-3
+    us = 1e-6
@@ -0,0 +1,21 @@
+"""Records returned by the experiments' evaluate_and_record() helpers."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True, frozen=True)
+class MeasurementResult:
+    setpoint_v: float
+    measured_v: float
+    objective: float
+
+
+@dataclass(slots=True, frozen=True)
+class PowerMeasurement:
+    amplitude: float
+    optical_power_nw: float
+    objective: float
+    # Only set when power is inferred from a photodiode voltage.
+    photodiode_v: float | None = None
@@ -6,30 +6,7 @@ from typing import Any
 
 from main import Parameter, run as run_bo
 
-try:
-    from artiq.experiment import EnvExperiment, NumberValue, delay, kernel, ms, us
-
-    ARTIQ_AVAILABLE = True
-    ARTIQ_IMPORT_ERROR = None
-except Exception as exc:  # pragma: no cover - allows import on non-ARTIQ hosts
-    ARTIQ_AVAILABLE = False
-    ARTIQ_IMPORT_ERROR = exc
-
-    class EnvExperiment:  # type: ignore[override]
-        pass
-
-    class NumberValue:  # type: ignore[override]
-        def __init__(self, *args, **kwargs):
-            pass
-
-    def kernel(func):  # type: ignore[override]
-        return func
-
-    def delay(_):  # type: ignore[override]
-        return None
-
-    ms = 1e-3
-    us = 1e-6
+from _artiq_shim import EnvExperiment, NumberValue
 
 
 class DeviceSpec:
@@ -96,13 +73,6 @@ class ConfigurableBOExperiment(EnvExperiment):
 
     CONFIG = BOExperimentConfig()
 
-    def _ensure_artiq(self) -> None:
-        if not ARTIQ_AVAILABLE:
-            raise RuntimeError(
-                "ARTIQ is not available in this Python environment. "
-                f"Import error: {ARTIQ_IMPORT_ERROR}"
-            )
-
     def _number_value_for(self, spec: NumericArgSpec) -> NumberValue:
         kwargs: dict[str, Any] = {"default": spec.default}
         if spec.minimum is not None:
@@ -118,9 +88,6 @@ class ConfigurableBOExperiment(EnvExperiment):
         return NumberValue(**kwargs)
 
     def build(self):
-        if not ARTIQ_AVAILABLE:
-            return
-
         for device in self.CONFIG.devices:
             self.setattr_device(device.name)
 
@@ -144,9 +111,6 @@ class ConfigurableBOExperiment(EnvExperiment):
         self.setattr_argument("seed", NumberValue(default=123, step=1, ndecimals=0, min=0))
 
     def prepare(self):
-        if not ARTIQ_AVAILABLE:
-            return
-
         for channel in self.CONFIG.channels:
             setattr(self, channel.name, int(getattr(self, channel.name)))
 
@@ -171,7 +135,6 @@ class ConfigurableBOExperiment(EnvExperiment):
         raise NotImplementedError("Subclasses must implement evaluate(params).")
 
     def run(self):
-        self._ensure_artiq()
         self.setup_bo_run()
 
         best = run_bo(
@@ -180,4 +143,4 @@ class ConfigurableBOExperiment(EnvExperiment):
             max_trials=self.max_trials,
             seed=self.seed,
         )
-        print(f"Hardware BO complete: {best}")
+        print(f"Hardware BO complete: params={best['params']} objective={best['objective']}")
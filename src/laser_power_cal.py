@@ -9,48 +9,33 @@ MAKE SURE TO CHECK WAVELENGTH_NM, DEFAULT DDS FREQ, DEFAULT TARGET POWER
 
 from __future__ import annotations
 
+from bo_results import PowerMeasurement
 from main import Parameter, run as run_bo
+import functools
 import time
+from ctypes import c_double, c_uint32, c_bool, c_int, c_int16, byref, create_string_buffer
 
-try:
-    from artiq.experiment import EnvExperiment, EnumerationValue, NumberValue, delay, kernel, MHz, ms, us
+from _artiq_shim import (
+    EnumerationValue,
+    EnvExperiment,
+    NumberValue,
+    delay_mu,
+    kernel,
+    MHz,
+    us,
+)
 
-    ARTIQ_AVAILABLE = True
-    ARTIQ_IMPORT_ERROR = None
-except Exception as exc:  # pragma: no cover - allows import on non-ARTIQ hosts
-    ARTIQ_AVAILABLE = False
-    ARTIQ_IMPORT_ERROR = exc
 
-    class EnvExperiment:  # type: ignore[override]
-        pass
+@functools.lru_cache(maxsize=1)
+def _load_tlpmx():
+    """Imports the Thorlabs TLPMX bindings on first use.
 
-    class NumberValue:  # type: ignore[override]
-        def __init__(self, *args, **kwargs):
-            pass
+    TLPMX.py is several thousand lines of ctypes declarations; importing it
+    lazily keeps loading this file cheap when ARTIQ only scans it.
+    """
+    import TLPMX
 
-    class EnumerationValue:  # type: ignore[override]
-        def __init__(self, *args, **kwargs):
-            pass
-
-    def kernel(func):  # type: ignore[override]
-        return func
-
-    def delay(_):  # type: ignore[override]
-        return None
-
-    MHz = 1e6
-    ms = 1e-3
-    us = 1e-6
-
-try:
-    from ctypes import c_double, c_uint32, c_bool, c_int, c_int16, byref, create_string_buffer
-    from TLPMX import TLPMX, TLPM_DEFAULT_CHANNEL
-
-    TLPMX_AVAILABLE = True
-    TLPMX_IMPORT_ERROR = None
-except Exception as exc:
-    TLPMX_AVAILABLE = False
-    TLPMX_IMPORT_ERROR = exc
+    return TLPMX
 
 
 # EDIT THESE FIRST
@@ -72,34 +57,20 @@ DEFAULT_SEED = 123
 AMPLITUDE_MIN = 0.05
 AMPLITUDE_MAX = 0.30
 
-class PowerMeasurement:
-    def __init__(self, amplitude: float, optical_power_nw: float, objective: float):
-        self.amplitude = amplitude
-        self.optical_power_nw = optical_power_nw
-        self.objective = objective
-
 
 class LaserPowerCalibration(EnvExperiment):
     """Single-use ARTIQ experiment for Urukul-driven laser power calibration."""
 
-    def _ensure_artiq(self) -> None:
-        if not ARTIQ_AVAILABLE:
-            raise RuntimeError(
-                "ARTIQ is not available in this Python environment. "
-                f"Import error: {ARTIQ_IMPORT_ERROR}"
-            )
-
-    def _ensure_tlpmx(self) -> None:
-        if not TLPMX_AVAILABLE:
+    def _ensure_tlpmx(self):
+        try:
+            return _load_tlpmx()
+        except Exception as exc:
             raise RuntimeError(
                 "TLPMX is not available in this Python environment. "
-                f"Import error: {TLPMX_IMPORT_ERROR}"
-            )
+                f"Import error: {exc}"
+            ) from exc
 
     def build(self):
-        if not ARTIQ_AVAILABLE:
-            return
-
         self.setattr_device("core")
         self.setattr_device("suservo0")
         self.setattr_device("suservo0_ch3")
@@ -138,9 +109,6 @@ class LaserPowerCalibration(EnvExperiment):
         )
 
     def prepare(self):
-        if not ARTIQ_AVAILABLE:
-            return
-
         self.dds_frequency_hz = float(self.dds_frequency_hz)
         self.target_power_nw = float(self.target_power_nw)
         self.settle_time_ms = float(self.settle_time_ms)
@@ -151,6 +119,10 @@ class LaserPowerCalibration(EnvExperiment):
         self.seed = int(self.seed)
 
         self._aom_enabled = 1 if self.aom_enabled == "on" else 0
+        self._dds_update_mu = self.core.seconds_to_mu(100 * us)
+        # Compiled once; the amplitude is read back over RPC on each call.
+        self._amplitude = 0.0
+        self._set_requested_amplitude = self.core.precompile(self._set_requested)
 
     def parameter_space(self) -> list[Parameter]:
         return [Parameter("dds_amplitude", (AMPLITUDE_MIN, AMPLITUDE_MAX))]
@@ -181,11 +153,7 @@ class LaserPowerCalibration(EnvExperiment):
     @kernel
     def configure_dds_output(self, amplitude: float):
         self.core.break_realtime()
-        self.suservo0.init()
-        if amplitude < 0.0:
-            amplitude = 0.0
-        if amplitude > 1.0:
-            amplitude = 1.0
+        amplitude = min(1.0, max(0.0, amplitude))
         self.suservo0_ch3.set_dds(
             profile=DDS_PROFILE,
             frequency=self.dds_frequency_hz,
@@ -194,7 +162,7 @@ class LaserPowerCalibration(EnvExperiment):
         )
         self.suservo0.set_config(enable=1)
         self.suservo0_ch3.set_y(DDS_PROFILE, amplitude)
-        delay(100 * us)
+        delay_mu(self._dds_update_mu)
 
     @kernel
     def aom_on(self):
@@ -206,10 +174,7 @@ class LaserPowerCalibration(EnvExperiment):
 
     @kernel
     def set_dds_amplitude(self, amplitude: float):
-        if amplitude < 0.0:
-            amplitude = 0.0
-        if amplitude > 1.0:
-            amplitude = 1.0
+        amplitude = min(1.0, max(0.0, amplitude))
         self.suservo0_ch3.set_y(DDS_PROFILE, amplitude)
 
     @kernel
@@ -217,10 +182,20 @@ class LaserPowerCalibration(EnvExperiment):
         self.core.break_realtime()
         self.set_dds_amplitude(amplitude)
 
+    @kernel
+    def _set_requested(self):
+        self.set_amplitude_and_settle(self.requested_amplitude())
+
+    def requested_amplitude(self) -> float:
+        return self._amplitude
+
     @kernel
     def init_hardware(self):
         self.core.reset()
         self.core.break_realtime()
+        # SUServo init resets the servo gateware; do it once here only, so
+        # configure_dds_output() stays safe to call again mid-run.
+        self.suservo0.init()
         self.configure_dds_output(0.0)
         if self._aom_enabled == 1:
             self.aom_on()
@@ -228,17 +203,17 @@ class LaserPowerCalibration(EnvExperiment):
             self.aom_off()
 
     def measure_power_nw(self, amplitude: float) -> float:
-        self.set_amplitude_and_settle(amplitude)
+        self._amplitude = amplitude
+        self._set_requested_amplitude()
         time.sleep(DEFAULT_SETTLE_TIME_S)
         power = c_double()
         total = 0.0
         for _ in range(self.adc_averages):
-            self._tlpm.measPower(byref(power), TLPM_DEFAULT_CHANNEL)
+            self._tlpm.measPower(byref(power), self._tlpm_channel)
             total += power.value
         return (total / self.adc_averages) * WATTS_TO_NANOWATTS
 
     def evaluate(self, params: dict[str, float]) -> float:
-        self._ensure_artiq()
         amplitude = float(params["dds_amplitude"])
         power_nw = self.measure_power_nw(amplitude)
         self._last_metric_name = "power_nw"
@@ -246,7 +221,6 @@ class LaserPowerCalibration(EnvExperiment):
         return self._objective_from_power_nw(power_nw)
 
     def evaluate_and_record(self, amplitude: float) -> PowerMeasurement:
-        self._ensure_artiq()
         power_nw = self.measure_power_nw(float(amplitude))
         return PowerMeasurement(
             amplitude=float(amplitude),
@@ -255,20 +229,20 @@ class LaserPowerCalibration(EnvExperiment):
         )
 
     def run(self):
-        self._ensure_artiq()
-        self._ensure_tlpmx()
+        tlpmx = self._ensure_tlpmx()
         self._ensure_devices_present()
         self.init_hardware()
         self._print_run_summary()
 
         resourceName = create_string_buffer(1024)
         deviceCount = c_uint32()
-        self._tlpm = TLPMX()
+        self._tlpm = tlpmx.TLPMX()
+        self._tlpm_channel = tlpmx.TLPM_DEFAULT_CHANNEL
         self._tlpm.findRsrc(byref(deviceCount))
         self._tlpm.getRsrcName(c_int(0), resourceName)
         self._tlpm.open(resourceName, c_bool(True), c_bool(True))
-        self._tlpm.setWavelength(c_double(WAVELENGTH_NM), TLPM_DEFAULT_CHANNEL)
-        self._tlpm.setPowerUnit(c_int16(0), TLPM_DEFAULT_CHANNEL)  # 0 = Watts
+        self._tlpm.setWavelength(c_double(WAVELENGTH_NM), self._tlpm_channel)
+        self._tlpm.setPowerUnit(c_int16(0), self._tlpm_channel)  # 0 = Watts
 
         try:
             best = run_bo(
@@ -5,12 +5,25 @@ Extremely minimal Bayesian optimization loop.
 from __future__ import annotations
 
 import math
-import random
-from typing import Callable, List, Protocol, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generator, List, Protocol, Tuple
 
 import numpy as np
-from sklearn.gaussian_process import GaussianProcessRegressor
-from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+from scipy.linalg import cho_solve, cholesky, solve_triangular
+from scipy.optimize import minimize
+from scipy.spatial.distance import cdist
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba is optional
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):  # type: ignore[override]
+        return lambda func: func
+
+SQRT5 = math.sqrt(5.0)
 
 
 class Parameter:
@@ -27,71 +40,557 @@ class BOExperiment(Protocol):
         """Returns objective value for the proposed physical params."""
 
 
-def normalize(params: List[Parameter], physical: dict) -> np.ndarray:
-    return np.array(
-        [(physical[p.name] - p.bounds[0]) / (p.bounds[1] - p.bounds[0]) for p in params],
-        dtype=float,
-    )
+def bounds_arrays(params: List[Parameter]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Returns parameter names, lower bounds and bound spans as flat arrays."""
+    names = [p.name for p in params]
+    lo = np.fromiter((p.bounds[0] for p in params), dtype=float, count=len(params))
+    span = np.fromiter((p.bounds[1] - p.bounds[0] for p in params), dtype=float, count=len(params))
+    return names, lo, span
 
 
-def denormalize(params: List[Parameter], unit: np.ndarray) -> dict:
-    return {
-        p.name: p.bounds[0] + float(unit[i]) * (p.bounds[1] - p.bounds[0])
-        for i, p in enumerate(params)
-    }
-
-
-def latin_hypercube(params: List[Parameter], n: int) -> List[dict]:
-    dim = len(params)
+def latin_hypercube(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Returns an (n, dim) Latin hypercube sample in the unit cube."""
     unit = np.zeros((n, dim))
     for j in range(dim):
-        strata = (np.arange(n) + np.random.rand(n)) / n
-        np.random.shuffle(strata)
+        strata = (np.arange(n) + rng.random(n)) / n
+        rng.shuffle(strata)
         unit[:, j] = strata
-    return [denormalize(params, unit[i]) for i in range(n)]
+    return unit
+
 
+@njit(cache=True, fastmath=True)
+def _synthetic_peak(amp: float, freq: float) -> float:
+    return math.exp(-0.5 * ((amp - 2.2) / 0.8) ** 2 - 0.5 * ((freq - 420.0) / 180.0) ** 2)
 
-def evaluate(params: dict) -> float:
+
+def evaluate(params: dict, rng: np.random.Generator | None = None) -> float:
     """
     Synthetic objective to exercise the loop without hardware.
     """
-    amp = params["noise_amp"]
-    freq = params["noise_freq"]
-    amp_peak = math.exp(-0.5 * ((amp - 2.2) / 0.8) ** 2)
-    freq_peak = math.exp(-0.5 * ((freq - 420.0) / 180.0) ** 2)
-    noise = random.gauss(0, 0.01)
-    return amp_peak * freq_peak + noise
+    noise = (rng or np.random.default_rng()).normal(0.0, 0.01)
+    return _synthetic_peak(params["noise_amp"], params["noise_freq"]) + noise
+
+
+def evaluate_batch(
+    amps: np.ndarray, freqs: np.ndarray, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    """
+    Vectorized synthetic objective for sweeping many (amp, freq) points at once.
+    """
+    amps = np.asarray(amps, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    peak = np.exp(-0.5 * ((amps - 2.2) / 0.8) ** 2 - 0.5 * ((freqs - 420.0) / 180.0) ** 2)
+    return peak + (rng or np.random.default_rng()).standard_normal(peak.shape) * 0.01
+
+
+class SyntheticExperiment:
+    """BOExperiment over the synthetic objective; owns its seeded noise."""
+
+    def __init__(self, seed: int | None = None):
+        self.rng = np.random.default_rng(seed)
+
+    def parameter_space(self) -> List[Parameter]:
+        return [Parameter("noise_amp", (0.0, 5.0)), Parameter("noise_freq", (0.0, 1000.0))]
+
+    def evaluate(self, params: dict[str, float]) -> float:
+        return evaluate(params, self.rng)
+
+    def evaluate_batch(self, proposals: List[dict[str, float]]) -> List[float]:
+        amps = [p["noise_amp"] for p in proposals]
+        freqs = [p["noise_freq"] for p in proposals]
+        return evaluate_batch(amps, freqs, self.rng).tolist()
+
+
+# _score_ucb() returns mean + beta*std computed in place: it overwrites `mean`
+# (and, without numba, `std`), so callers must not reuse either afterwards.
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _score_ucb(mean: np.ndarray, std: np.ndarray, beta: float) -> np.ndarray:
+        for i in range(mean.shape[0]):
+            mean[i] += beta * std[i]
+        return mean
+
+else:
+
+    def _score_ucb(mean: np.ndarray, std: np.ndarray, beta: float) -> np.ndarray:
+        std *= beta
+        mean += std
+        return mean
+
+
+def _distances(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """Euclidean distance matrix; a plain broadcast for one-dimensional inputs."""
+    if A.shape[1] == 1:
+        return np.abs(A - B.T)
+    return cdist(A, B)
+
+
+class MaternGP:
+    """Gaussian process with a Matern nu=2.5 kernel plus white noise.
+
+    Targets are normalized to zero mean and unit variance. fit() re-optimizes
+    the length scale and noise level by maximizing the log marginal
+    likelihood; extend() grows the Cholesky factor by one observation while
+    keeping the hyperparameters fixed.
+    """
+
+    default_length_scale = 0.5
+    default_noise_level = 1e-4
+    restart_length_scales = (0.05, 0.2, 1.0)
+
+    def __init__(
+        self,
+        length_scale: float = default_length_scale,
+        noise_level: float = default_noise_level,
+        jitter: float = 1e-6,
+        log_bounds: Tuple[float, float] = (math.log(1e-5), math.log(1e5)),
+    ):
+        self.length_scale = length_scale
+        self.noise_level = noise_level
+        self.jitter = jitter
+        self.log_bounds = log_bounds
+        # Lower Cholesky factor of K + (noise_level + jitter)*I over all
+        # observed points, and the matching normalized weights K^-1 y.
+        self.L: np.ndarray | None = None
+        self.alpha: np.ndarray | None = None
+        self.y_mean = 0.0
+        self.y_std = 1.0
+
+    @staticmethod
+    def _matern(D: np.ndarray, length_scale: float) -> np.ndarray:
+        s = SQRT5 * D / length_scale
+        return (1.0 + s + s * s / 3.0) * np.exp(-s)
+
+    def kernel(self, A: np.ndarray, B: np.ndarray) -> np.ndarray:
+        return self._matern(_distances(A, B), self.length_scale)
+
+    def _normalize(self, y: np.ndarray) -> np.ndarray:
+        self.y_mean = y.mean()
+        y_std = y.std()
+        self.y_std = y_std if y_std > 0.0 else 1.0
+        return (y - self.y_mean) / self.y_std
+
+    def _neg_log_marginal_likelihood(
+        self, log_theta: np.ndarray, D: np.ndarray, y: np.ndarray
+    ) -> Tuple[float, np.ndarray]:
+        length_scale, noise_level = np.exp(log_theta)
+        s = SQRT5 * D / length_scale
+        decay = np.exp(-s)
+        K = (1.0 + s + s * s / 3.0) * decay
+        K[np.diag_indices_from(K)] += noise_level + self.jitter
+        try:
+            L = cholesky(K, lower=True)
+        except np.linalg.LinAlgError:
+            return np.inf, np.zeros(2)
+        alpha = cho_solve((L, True), y)
+        nll = 0.5 * y @ alpha + np.log(np.diag(L)).sum() + 0.5 * len(y) * math.log(2.0 * math.pi)
+        inner = cho_solve((L, True), np.eye(len(y))) - np.outer(alpha, alpha)
+        dK_dlog_length = s * s / 3.0 * (1.0 + s) * decay
+        grad = 0.5 * np.array([(inner * dK_dlog_length).sum(), noise_level * np.trace(inner)])
+        return nll, grad
+
+    def _optimize_hyperparameters(
+        self, length_scale: float, noise_level: float, D: np.ndarray, y_norm: np.ndarray
+    ):
+        return minimize(
+            self._neg_log_marginal_likelihood,
+            np.log([length_scale, noise_level]),
+            args=(D, y_norm),
+            jac=True,
+            method="L-BFGS-B",
+            bounds=[self.log_bounds] * 2,
+        )
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> None:
+        y_norm = self._normalize(y)
+        D = _distances(X, X)
+        # Warm start from the last fit, plus the fixed default so one bad fit
+        # is not carried into every later refit.
+        best = self._optimize_hyperparameters(self.length_scale, self.noise_level, D, y_norm)
+        if (self.length_scale, self.noise_level) != (self.default_length_scale, self.default_noise_level):
+            result = self._optimize_hyperparameters(
+                self.default_length_scale, self.default_noise_level, D, y_norm
+            )
+            if result.fun < best.fun:
+                best = result
+        # The likelihood is flat towards tiny length scales, so a start can
+        # slide into a white-noise model with a flat UCB. A length scale below
+        # the closest pair of points means that happened; retry from a few
+        # fixed length scales.
+        spacing = D[D > 0.0]
+        min_spacing = spacing.min() if spacing.size else 0.0
+        if not np.isfinite(best.fun) or math.exp(best.x[0]) < min_spacing:
+            for length_scale in self.restart_length_scales:
+                result = self._optimize_hyperparameters(length_scale, self.noise_level, D, y_norm)
+                if result.fun < best.fun:
+                    best = result
+        if np.isfinite(best.fun):
+            self.length_scale, self.noise_level = np.exp(best.x)
+
+        K = self._matern(D, self.length_scale)
+        K[np.diag_indices_from(K)] += self.noise_level + self.jitter
+        self.L = cholesky(K, lower=True)
+        self.alpha = cho_solve((self.L, True), y_norm)
+
+    def extend(self, X: np.ndarray, x_new: np.ndarray) -> None:
+        """Appends one row to L for x_new; call update_targets() afterwards."""
+        k_new = self.kernel(X, x_new[None, :])[:, 0]
+        k_nn = 1.0 + self.noise_level + self.jitter
+        l12 = solve_triangular(self.L, k_new, lower=True)
+        n = len(l12)
+        L = np.zeros((n + 1, n + 1))
+        L[:n, :n] = self.L
+        L[n, :n] = l12
+        L[n, n] = math.sqrt(max(k_nn - l12 @ l12, 1e-12))
+        self.L = L
+
+    def update_targets(self, y: np.ndarray) -> None:
+        self.alpha = cho_solve((self.L, True), self._normalize(y))
+
+    def predict(self, X: np.ndarray, C: np.ndarray, latent: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictive mean and std at C; latent=True leaves out the noise variance."""
+        K_star = self.kernel(X, C)
+        mean = K_star.T @ self.alpha
+        V = solve_triangular(self.L, K_star, lower=True)
+        var = (1.0 if latent else 1.0 + self.noise_level) - np.einsum("ij,ij->j", V, V)
+        std = np.sqrt(np.clip(var, 0.0, None))
+        return mean * self.y_std + self.y_mean, std * self.y_std
+
+    def predict_with_grad(
+        self, X: np.ndarray, x: np.ndarray, latent: bool = False
+    ) -> Tuple[float, float, np.ndarray, np.ndarray]:
+        """Mean and std at one point x, plus their gradients with respect to x.
+
+        Uses the closed-form Matern nu=2.5 derivative
+        dk/dx = -(5/3) (1 + s) exp(-s) (x - x_i) / l^2 with s = sqrt(5) r / l.
+        """
+        diff = x[None, :] - X
+        s = SQRT5 * np.sqrt((diff * diff).sum(axis=1)) / self.length_scale
+        decay = np.exp(-s)
+        k_star = (1.0 + s + s * s / 3.0) * decay
+        dk_star = (-5.0 / 3.0 * (1.0 + s) * decay)[:, None] * diff / self.length_scale**2
+
+        w = cho_solve((self.L, True), k_star)
+        prior_var = 1.0 if latent else 1.0 + self.noise_level
+        std = math.sqrt(max(prior_var - k_star @ w, 1e-12))
+        dmean = dk_star.T @ self.alpha
+        dstd = -(dk_star.T @ w) / std
+        mean = k_star @ self.alpha * self.y_std + self.y_mean
+        return mean, std * self.y_std, dmean * self.y_std, dstd * self.y_std
+
+
+def _fit_copy(gp: MaternGP, X: np.ndarray, y: np.ndarray) -> MaternGP:
+    """Fits a fresh GP warm-started from gp's hyperparameters; gp is untouched."""
+    fitted = MaternGP(gp.length_scale, gp.noise_level, gp.jitter, gp.log_bounds)
+    fitted.fit(X, y)
+    return fitted
+
 
 class SimpleBO:
-    def __init__(self, parameters: List[Parameter], beta: float = 2.0):
+    def __init__(
+        self,
+        parameters: List[Parameter],
+        beta: float = 2.0,
+        refit_every: int = 5,
+        rng: np.random.Generator | None = None,
+    ):
         self.parameters = parameters
         self.beta = beta
-        kernel = Matern(length_scale=0.5, nu=2.5) + WhiteKernel(noise_level=1e-4)
-        self.gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, alpha=1e-6)
-        self.X: List[np.ndarray] = []
-        self.y: List[float] = []
+        self.refit_every = refit_every
+        self.gp = MaternGP(length_scale=0.5, noise_level=1e-4)
+        self._rng = np.random.default_rng() if rng is None else rng
+        # Hyperparameter refits run on a worker thread so they overlap with the
+        # hardware measurement of the proposal returned by suggest().
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_fit: Future | None = None
+        self._n_at_last_fit = 0
+        # Observations live in preallocated buffers that double when full;
+        # only the first _n rows are valid.
+        self._cap = 16
+        self._X = np.empty((self._cap, len(parameters)))
+        self._y = np.empty(self._cap)
+        self._n = 0
+
+    @property
+    def X(self) -> np.ndarray:
+        return self._X[: self._n]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[: self._n]
+
+    def _grow(self) -> None:
+        self._cap *= 2
+        X = np.empty((self._cap, self._X.shape[1]))
+        y = np.empty(self._cap)
+        X[: self._n] = self._X[: self._n]
+        y[: self._n] = self._y[: self._n]
+        self._X, self._y = X, y
+
+    def _neg_ucb(self, x: np.ndarray, X: np.ndarray, latent: bool) -> Tuple[float, np.ndarray]:
+        mean, std, dmean, dstd = self.gp.predict_with_grad(X, x, latent)
+        return -(mean + self.beta * std), -(dmean + self.beta * dstd)
+
+    def _adopt_refit(self) -> None:
+        gp = self._pending_fit.result()
+        self._pending_fit = None
+        X = self.X
+        for i in range(len(gp.alpha), self._n):
+            gp.extend(X[:i], X[i])
+        gp.update_targets(self.y)
+        self.gp = gp
+
+    def _update_model(self) -> None:
+        X, y = self.X, self.y
+        if self._pending_fit is not None:
+            self._adopt_refit()
+        if self.gp.L is None:
+            self.gp.fit(X, y)
+            self._n_at_last_fit = self._n
+        elif self._n - self._n_at_last_fit >= self.refit_every:
+            # Adopted at the next suggest(), which waits for it if needed, so
+            # results do not depend on thread timing. Counted from the last
+            # fit rather than by _n % refit_every, since batches add several
+            # points at a time.
+            self._pending_fit = self._executor.submit(_fit_copy, self.gp, X.copy(), y.copy())
+            self._n_at_last_fit = self._n
 
-    def suggest(self, candidates: int = 256) -> np.ndarray:
+    def suggest(self, candidates: int = 64, restarts: int = 4) -> np.ndarray:
         dim = len(self.parameters)
-        if len(self.y) < dim + 1:
-            return np.random.rand(dim)
-
-        X = np.vstack(self.X)
-        y = np.array(self.y)
-        self.gp.fit(X, y)
-
-        unit_candidates = np.random.rand(candidates, dim)
-        preds = self.gp.predict(unit_candidates, return_std=True)
-        if isinstance(preds, tuple):
-            mean, std = preds[0], preds[1]  # ignore any extra values
-        else:
-            mean, std = preds, np.zeros_like(preds)
-        ucb = mean + self.beta * std
-        return unit_candidates[int(np.argmax(ucb))]
+        if self._n < dim + 1:
+            return self._rng.random(dim)
+
+        self._update_model()
+        return self._maximize_ucb(candidates, restarts)
+
+    def suggest_batch(self, q: int, candidates: int = 64, restarts: int = 4) -> np.ndarray:
+        """Returns q points to measure together, as a (q, dim) unit array.
+
+        Constant liar: each pick is temporarily observed with the worst
+        objective seen so far, and the acquisition uses the latent
+        (noise-free) std, so the following picks avoid it. The fantasies are
+        dropped again before returning.
+        """
+        dim = len(self.parameters)
+        if self._n < dim + 1:
+            return self._rng.random((q, dim))
+
+        self._update_model()
+        n = self._n
+        lie = float(self.y.min())
+        batch = np.empty((q, dim))
+        for i in range(q):
+            batch[i] = self._maximize_ucb(candidates, restarts, latent=True)
+            if i + 1 < q:
+                self.observe(batch[i], lie)
+        # L for the first n points is the leading block of the extended factor.
+        self._n = n
+        self.gp.L = self.gp.L[:n, :n]
+        self.gp.update_targets(self.y)
+        return batch
+
+    def _maximize_ucb(self, candidates: int, restarts: int, latent: bool = False) -> np.ndarray:
+        dim = len(self.parameters)
+        X = self.X
+
+        # Coarse random scan to seed the local optimizer.
+        unit_candidates = self._rng.random((candidates, dim))
+        mean, std = self.gp.predict(X, unit_candidates, latent)
+        ucb = _score_ucb(mean, std, self.beta)
+        order = np.argsort(ucb)
+        best_x, best_value = unit_candidates[order[-1]], -ucb[order[-1]]
+
+        bounds = [(0.0, 1.0)] * dim
+        for x0 in unit_candidates[order[-restarts:]]:
+            result = minimize(
+                self._neg_ucb, x0, args=(X, latent), jac=True, method="L-BFGS-B", bounds=bounds
+            )
+            if result.fun < best_value:
+                best_x, best_value = result.x, result.fun
+        return np.clip(best_x, 0.0, 1.0)
+
+    def close(self) -> None:
+        """Stops the refit worker; a refit still pending is dropped."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pending_fit = None
 
     def observe(self, unit_x: np.ndarray, objective: float) -> None:
-        self.X.append(unit_x.astype(float))
-        self.y.append(float(objective))
+        if self.gp.L is not None:
+            self.gp.extend(self.X, unit_x)
+        if self._n == self._cap:
+            self._grow()
+        self._X[self._n] = unit_x
+        self._y[self._n] = objective
+        self._n += 1
+        if self.gp.L is not None:
+            self.gp.update_targets(self.y)
+
+
+class SimpleBO1D(SimpleBO):
+    """SimpleBO specialized for a single parameter.
+
+    UCB is maximized over a fixed dense grid on [0, 1] instead of a random
+    scan plus L-BFGS-B restarts, which is both cheaper and exhaustive in 1D.
+    """
+
+    def __init__(self, parameters: List[Parameter], *args, grid_size: int = 1024, **kwargs):
+        super().__init__(parameters, *args, **kwargs)
+        self._grid = np.linspace(0.0, 1.0, grid_size)[:, None]
+
+    def _maximize_ucb(self, candidates: int, restarts: int, latent: bool = False) -> np.ndarray:
+        mean, std = self.gp.predict(self.X, self._grid, latent)
+        ucb = _score_ucb(mean, std, self.beta)
+        return self._grid[int(np.argmax(ucb))].copy()
+
+
+class _Trials:
+    """Setup and per-point bookkeeping shared by optimize() and optimize_batch()."""
+
+    def __init__(
+        self,
+        experiment: BOExperiment,
+        init_trials: int,
+        max_trials: int,
+        seed: int,
+        stabilizer: Callable[[dict], None] | None,
+        log_every: int,
+    ):
+        rng = np.random.default_rng(seed)
+        parameters = experiment.parameter_space()
+        self.experiment = experiment
+        self.names, self.lo, self.span = bounds_arrays(parameters)
+        bo_cls = SimpleBO1D if len(parameters) == 1 else SimpleBO
+        self.bo = bo_cls(parameters, rng=rng)
+        self.initial_unit = latin_hypercube(init_trials, len(parameters), rng)
+        self.stabilize = stabilizer or (lambda _: None)
+        self.log_every = log_every
+        self.params = np.empty((max_trials, len(self.names)))
+        self.objectives = np.empty(max_trials)
+        self.best_trial = None
+        self.best_objective = -float("inf")
+
+    def new_proposal(self) -> dict:
+        return dict.fromkeys(self.names, 0.0)
+
+    def propose(self, t: int, unit_x: np.ndarray, proposal: dict) -> None:
+        """Maps unit_x to physical units into trial t's row and into proposal."""
+        row = self.params[t]
+        np.multiply(unit_x, self.span, out=row)
+        row += self.lo
+        for name, value in zip(self.names, row.tolist()):
+            proposal[name] = value
+        self.stabilize(proposal)
+
+    def record(
+        self, t: int, unit_x: np.ndarray, objective_value: float, proposal: dict, metric: bool = True
+    ) -> None:
+        self.bo.observe(unit_x, objective_value)
+        self.objectives[t] = objective_value
+        improved = objective_value > self.best_objective
+        if improved:
+            self.best_trial, self.best_objective = t, objective_value
+        if improved or (self.log_every > 0 and t % self.log_every == 0):
+            _log_trial(self.experiment, t, objective_value, proposal, metric)
+
+    def result(self) -> dict:
+        history = [
+            (t, objective, dict(zip(self.names, params)))
+            for t, (objective, params) in enumerate(zip(self.objectives.tolist(), self.params.tolist()))
+        ]
+        best = {
+            "params": None if self.best_trial is None else history[self.best_trial][2],
+            "objective": self.best_objective,
+        }
+        print("\nBest found:")
+        print(best)
+        return {**best, "history": history}
+
+
+def optimize(
+    experiment: BOExperiment,
+    init_trials: int = 5,
+    max_trials: int = 100,
+    seed: int = 123,
+    stabilizer: Callable[[dict], None] | None = None,
+    log_every: int = 10,
+) -> Generator[dict, float, dict]:
+    """Step-wise BO loop: yields each proposal and expects its objective via send().
+
+    Lets callers that own the measurement loop (e.g. a long-running ARTIQ
+    kernel) drive trials one at a time. The same proposal dict is updated in
+    place and yielded every trial, so copy it if it must outlive the trial.
+    The generator returns the best result together with the full
+    (trial, objective, params) history. Only every log_every-th trial and new
+    bests are printed; log_every <= 0 prints new bests only.
+    """
+    trials = _Trials(experiment, init_trials, max_trials, seed, stabilizer, log_every)
+    proposal = trials.new_proposal()
+    try:
+        for t in range(max_trials):
+            unit_x = trials.initial_unit[t] if t < init_trials else trials.bo.suggest()
+            trials.propose(t, unit_x, proposal)
+            objective_value = yield proposal
+            trials.record(t, unit_x, objective_value, proposal)
+    finally:
+        trials.bo.close()
+
+    return trials.result()
+
+
+def optimize_batch(
+    experiment: BOExperiment,
+    batch_size: int = 4,
+    init_trials: int = 5,
+    max_trials: int = 100,
+    seed: int = 123,
+    stabilizer: Callable[[dict], None] | None = None,
+    log_every: int = 10,
+) -> Generator[List[dict], List[float], dict]:
+    """Batched optimize(): yields lists of proposals and expects their
+    objectives, in the same order, via send().
+
+    Lets one kernel call measure a whole batch instead of one point per
+    round trip. The whole initial design comes first as a single batch of
+    init_trials points (it needs no model), then BO batches of up to
+    batch_size. The last batch is cut short so that exactly max_trials points
+    are measured. Proposal dicts are reused across batches like in optimize().
+    """
+    trials = _Trials(experiment, init_trials, max_trials, seed, stabilizer, log_every)
+    proposals = [trials.new_proposal() for _ in range(max(batch_size, init_trials))]
+
+    t = 0
+    try:
+        while t < max_trials:
+            if t == 0 and init_trials > 0:
+                q = min(init_trials, max_trials)
+                unit_batch = trials.initial_unit[:q]
+            else:
+                q = min(batch_size, max_trials - t)
+                unit_batch = trials.bo.suggest_batch(q)
+            for i in range(q):
+                trials.propose(t + i, unit_batch[i], proposals[i])
+            objective_values = yield proposals[:q]
+            for unit_x, proposal, objective_value in zip(unit_batch, proposals, objective_values):
+                # The experiment's last metric belongs to the end of the
+                # batch, not to this point, so leave it out.
+                trials.record(t, unit_x, objective_value, proposal, metric=False)
+                t += 1
+    finally:
+        trials.bo.close()
+
+    return trials.result()
+
+
+def _log_trial(
+    experiment: BOExperiment, t: int, objective_value: float, proposal: dict, metric: bool = True
+) -> None:
+    metric_name = getattr(experiment, "_last_metric_name", None) if metric else None
+    metric_value = getattr(experiment, "_last_metric_value", None)
+    metric_text = ""
+    if metric_name is not None and metric_value is not None:
+        metric_text = f" | {metric_name}={float(metric_value):.6f}"
+    print(f"trial {t:02d} | objective={objective_value:.4f}{metric_text} | params={proposal}")
 
 
 def run(
@@ -100,34 +599,39 @@ def run(
     max_trials: int = 100,
     seed: int = 123,
     stabilizer: Callable[[dict], None] | None = None,
+    log_every: int = 10,
+) -> dict:
+    steps = optimize(experiment, init_trials, max_trials, seed, stabilizer, log_every)
+    try:
+        proposal = next(steps)
+        while True:
+            proposal = steps.send(experiment.evaluate(proposal))
+    except StopIteration as stop:
+        return stop.value
+
+
+def run_batch(
+    experiment: BOExperiment,
+    batch_size: int = 4,
+    init_trials: int = 5,
+    max_trials: int = 100,
+    seed: int = 123,
+    stabilizer: Callable[[dict], None] | None = None,
+    log_every: int = 10,
 ) -> dict:
-    random.seed(seed)
-    np.random.seed(seed)
-    stabilize = stabilizer or (lambda _: None)
-    parameters = experiment.parameter_space()
-
-    bo = SimpleBO(parameters)
-    initial = latin_hypercube(parameters, init_trials)
-
-    best = {"params": None, "objective": -float("inf")}
-
-    for t in range(max_trials):
-        proposal = initial[t] if t < init_trials else denormalize(parameters, bo.suggest())
-        stabilize(proposal)
-        objective_value = experiment.evaluate(proposal)
-        bo.observe(normalize(parameters, proposal), objective_value)
-        if objective_value > best["objective"]:
-            best = {"params": proposal, "objective": objective_value}
-        metric_name = getattr(experiment, "_last_metric_name", None)
-        metric_value = getattr(experiment, "_last_metric_value", None)
-        metric_text = ""
-        if metric_name is not None and metric_value is not None:
-            metric_text = f" | {metric_name}={float(metric_value):.6f}"
-        print(f"trial {t:02d} | objective={objective_value:.4f}{metric_text} | params={proposal}")
-
-    print("\nBest found:")
-    print(best)
-    return best
+    """run() on top of optimize_batch(); uses experiment.evaluate_batch() if defined."""
+    batched = hasattr(experiment, "evaluate_batch")
+    steps = optimize_batch(experiment, batch_size, init_trials, max_trials, seed, stabilizer, log_every)
+    try:
+        proposals = next(steps)
+        while True:
+            if batched:
+                objectives = experiment.evaluate_batch(proposals)
+            else:
+                objectives = [experiment.evaluate(p) for p in proposals]
+            proposals = steps.send(objectives)
+    except StopIteration as stop:
+        return stop.value
 
 
 # if __name__ == "__main__":
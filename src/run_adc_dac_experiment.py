@@ -2,34 +2,53 @@
 
 from __future__ import annotations
 
-from main import Parameter
+import functools
+
+import numpy as np
+
+from bo_results import MeasurementResult
+from main import Parameter, optimize_batch
 from hardware_driver import (
-    ARTIQ_AVAILABLE,
     BOExperimentConfig,
     ChannelSpec,
     ConfigurableBOExperiment,
     DeviceSpec,
     NumericArgSpec,
-    delay,
-    kernel,
-    ms,
-    us,
 )
+from _artiq_shim import TBool, TFloat, TList, adc_mu_to_volt, delay_mu, kernel, ms, portable, us
 
-
-class MeasurementResult:
-    def __init__(self, setpoint_v: float, measured_v: float, objective: float):
-        self.setpoint_v = setpoint_v
-        self.measured_v = measured_v
-        self.objective = objective
+# Zotino output step: +-10 V over 16 bits.
+DAC_V_PER_LSB = 20.0 / (1 << 16)
+# Slack added before each batch point's DAC write. sample_mu() blocks on an
+# RTIO input, so the timeline is already behind the wall clock when it
+# returns, and set_dac() schedules its SPI writes before now_mu. Not yet
+# tuned on hardware.
+BATCH_POINT_SLACK = 20 * us
 
 
 class ADCDACExperiment(ConfigurableBOExperiment):
     """Example ADC/DAC BO experiment using Zotino and Sampler.
 
     Override CONFIG and evaluate() for custom experiments.
+
+    run() keeps a single kernel on the core device for the whole BO run. BO
+    proposes batch_size setpoints at a time; the kernel measures a whole batch
+    and only then calls back to the host (exchange_batch) to report it and
+    fetch the next one. The per-DAC-code cache in evaluate() only serves
+    callers that go through evaluate() (e.g. main.run()); run() never does.
     """
 
+    kernel_invariants = {
+        "core",
+        "zotino0",
+        "sampler0",
+        "dac_channel",
+        "adc_channel",
+        "_sample_index",
+        "_dac_channels",
+        "_target_v",
+    }
+
     CONFIG = BOExperimentConfig(
         devices=[DeviceSpec("core"), DeviceSpec("zotino0"), DeviceSpec("sampler0")],
         channels=[
@@ -42,14 +61,34 @@ class ADCDACExperiment(ConfigurableBOExperiment):
             NumericArgSpec(
                 "initial_dac_voltage", default=0.0, minimum=-10.0, maximum=10.0, unit="V"
             ),
+            NumericArgSpec("batch_size", default=4, minimum=1, integer=True, step=1),
         ],
     )
 
     def prepare(self):
         super().prepare()
-        if not ARTIQ_AVAILABLE:
-            return
-        self._sample_buffer = [0.0] * 8
+        # Sampler.sample_mu() reads channels from 7 downwards into an
+        # even-length buffer, so only fetch as many as needed to reach adc_channel.
+        # A typed int32 array matches the codes sample_mu() writes.
+        n_read = (8 - self.adc_channel + 1) & ~1
+        self._sample_buffer_mu = np.zeros(n_read, dtype=np.int32)
+        self._sample_index = self.adc_channel - (8 - n_read)
+        # Kernel delays in machine units.
+        self._dac_init_mu = self.core.seconds_to_mu(1 * ms)
+        self._adc_init_mu = self.core.seconds_to_mu(5 * ms)
+        self._adc_gain_mu = self.core.seconds_to_mu(100 * us)
+        self._dac_settle_mu = self.core.seconds_to_mu(200 * us)
+        self._batch_slack_mu = self.core.seconds_to_mu(BATCH_POINT_SLACK)
+        # Reused by measure_once_mu() so no lists are built per trial.
+        self._dac_values = [0.0]
+        self._dac_channels = [self.dac_channel]
+        # optimize_batch() sends the whole initial design as the first batch.
+        self._batch_objectives = [0.0] * max(self.batch_size, self.init_trials)
+        # target_voltage is already cast to float by ConfigurableBOExperiment.prepare().
+        self._target_v = self.target_voltage
+        # Setpoints that round to the same DAC code produce the same output,
+        # so repeats reuse the last result instead of running the kernel again.
+        self._objective_for_code = functools.lru_cache(maxsize=64)(self._measure_code_objective)
 
     @kernel
     def init_hardware(self):
@@ -57,43 +96,117 @@ class ADCDACExperiment(ConfigurableBOExperiment):
         self.core.break_realtime()
 
         self.zotino0.init()
-        delay(1 * ms)
+        delay_mu(self._dac_init_mu)
 
         self.sampler0.init()
-        delay(5 * ms)
+        delay_mu(self._adc_init_mu)
         self.sampler0.set_gain_mu(self.adc_channel, 0)
-        delay(100 * us)
+        delay_mu(self._adc_gain_mu)
 
     @kernel
-    def measure_once(self, dac_voltage: float) -> float:
+    def _set_and_sample_mu(self, dac_voltage: float) -> int:
+        self._dac_values[0] = min(10.0, max(-10.0, dac_voltage))
+        self.zotino0.set_dac(self._dac_values, self._dac_channels)
+        delay_mu(self._dac_settle_mu)
+        self.sampler0.sample_mu(self._sample_buffer_mu)
+        return self._sample_buffer_mu[self._sample_index]
+
+    @kernel
+    def measure_once_mu(self, dac_voltage: float) -> int:
         self.core.break_realtime()
+        return self._set_and_sample_mu(dac_voltage)
+
+    @kernel
+    def measure_objective(self, dac_voltage: float) -> float:
+        """Sets the DAC and returns the BO objective for the resulting ADC reading."""
+        return self._objective_from_voltage(self._volts_from_mu(self.measure_once_mu(dac_voltage)))
 
-        if dac_voltage > 10.0:
-            dac_voltage = 10.0
-        if dac_voltage < -10.0:
-            dac_voltage = -10.0
+    @kernel
+    def measure_batch(self, setpoints: TList(TFloat)):
+        """Measures every setpoint in one kernel call into _batch_objectives."""
+        self.core.break_realtime()
+        for i in range(len(setpoints)):
+            delay_mu(self._batch_slack_mu)
+            code = self._set_and_sample_mu(setpoints[i])
+            self._batch_objectives[i] = self._objective_from_voltage(self._volts_from_mu(code))
 
-        self.zotino0.set_dac([dac_voltage], [self.dac_channel])
-        delay(200 * us)
-        self.sampler0.sample(self._sample_buffer)
-        return self._sample_buffer[self.adc_channel]
+    def measure_once(self, dac_voltage: float) -> float:
+        return self._volts_from_mu(self.measure_once_mu(dac_voltage))
+
+    @portable
+    def _volts_from_mu(self, code: int) -> float:
+        # init_hardware() programs unity gain (gain code 0) on adc_channel.
+        return adc_mu_to_volt(code, corrected_fs=self.sampler0.corrected_fs)
+
+    @portable
+    def _objective_from_voltage(self, measured: float) -> float:
+        error = measured - self._target_v
+        return -(error * error)
+
+    @kernel
+    def run_batches(self):
+        while self._run_next_batch():
+            pass
+
+    @kernel
+    def _run_next_batch(self) -> TBool:
+        # Separate function so the RPC-returned list is freed every batch.
+        setpoints = self.exchange_batch(self._batch_objectives)
+        if len(setpoints) == 0:
+            return False
+        self.measure_batch(setpoints)
+        return True
+
+    def exchange_batch(self, objectives: TList(TFloat)) -> TList(TFloat):
+        """RPC from run_batches(): record the last batch, return the next one.
+
+        objectives holds the results of the previously returned setpoints (it
+        is ignored on the first call). An empty list ends the run.
+        """
+        if not self._in_flight:
+            proposals = next(self._trials)
+        else:
+            try:
+                proposals = self._trials.send(objectives[: len(self._in_flight)])
+            except StopIteration as stop:
+                self._best = stop.value
+                proposals = []
+        self._in_flight = [p["dac_voltage"] for p in proposals]
+        return self._in_flight
+
+    def _measure_code_objective(self, code: int) -> float:
+        return self.measure_objective(code * DAC_V_PER_LSB)
 
     def setup_bo_run(self) -> None:
         self.init_hardware()
 
     def evaluate(self, params: dict[str, float]) -> float:
-        self._ensure_artiq()
-        setpoint = float(params["dac_voltage"])
-        measured = float(self.measure_once(setpoint))
-        error = measured - float(self.target_voltage)
-        return -(error * error)
+        return self._objective_for_code(round(params["dac_voltage"] / DAC_V_PER_LSB))
+
+    def evaluate_batch(self, proposals: list[dict[str, float]]) -> list[float]:
+        setpoints = [p["dac_voltage"] for p in proposals]
+        self.measure_batch(setpoints)
+        return self._batch_objectives[: len(setpoints)]
 
     def evaluate_and_record(self, setpoint_v: float) -> MeasurementResult:
-        self._ensure_artiq()
-        measured = float(self.measure_once(float(setpoint_v)))
-        error = measured - float(self.target_voltage)
+        measured = self.measure_once(setpoint_v)
         return MeasurementResult(
-            setpoint_v=float(setpoint_v),
+            setpoint_v=setpoint_v,
             measured_v=measured,
-            objective=-(error * error),
+            objective=self._objective_from_voltage(measured),
+        )
+
+    def run(self):
+        self.setup_bo_run()
+
+        self._best = None
+        self._trials = optimize_batch(
+            experiment=self,
+            batch_size=self.batch_size,
+            init_trials=self.init_trials,
+            max_trials=self.max_trials,
+            seed=self.seed,
         )
+        self._in_flight = []
+        self.run_batches()
+        print(f"Hardware BO complete: params={self._best['params']} objective={self._best['objective']}")
@@ -2,27 +2,25 @@
 
 from __future__ import annotations
 
+import functools
+
+from bo_results import PowerMeasurement
 from main import Parameter
 from hardware_driver import (
-    ARTIQ_AVAILABLE,
     BOExperimentConfig,
     ChannelSpec,
     ConfigurableBOExperiment,
     DeviceSpec,
     NumericArgSpec,
-    delay,
-    kernel,
-    ms,
-    us,
 )
+from _artiq_shim import SUSERVO_T_CYCLE, adc_mu_to_volt, delay_mu, kernel, ms, us
 
-
-class PowerMeasurement:
-    def __init__(self, amplitude: float, photodiode_v: float, optical_power_nw: float, objective: float):
-        self.amplitude = amplitude
-        self.photodiode_v = photodiode_v
-        self.optical_power_nw = optical_power_nw
-        self.objective = objective
+# Full scale of the AD9910 14-bit amplitude scale factor.
+ASF_MAX = 0x3FFF
+# Minimum gap between SUServo ADC reads. get_adc_mu() blocks on an RTIO
+# input, which uses up the timeline slack, so the next read must leave room
+# for input latency and the loop body. Not yet tuned on hardware.
+MIN_ADC_READ_SPACING = 5 * us
 
 
 class UrukulSamplerPowerBOExperiment(ConfigurableBOExperiment):
@@ -55,6 +53,22 @@ class UrukulSamplerPowerBOExperiment(ConfigurableBOExperiment):
 
     def prepare(self):
         super().prepare()
+        # Reads faster than one servo cycle only repeat the same sample.
+        self._sample_spacing_mu = self.core.seconds_to_mu(max(SUSERVO_T_CYCLE, MIN_ADC_READ_SPACING))
+        self._dds_init_mu = self.core.seconds_to_mu(1 * ms)
+        self._servo_init_mu = self.core.seconds_to_mu(5 * ms)
+        self._pgia_mu = self.core.seconds_to_mu(100 * us)
+        self._settle_mu = self.core.seconds_to_mu(self.settle_time_ms * ms)
+        # Frequency and phase are fixed for the run; only amplitude is swept.
+        self._ftw = self.urukul0_dds.frequency_to_ftw(self.rf_frequency_hz)
+        self._pow = self.urukul0_dds.turns_to_pow(self.rf_phase_turns)
+        self._inv_n = 1.0 / self.adc_averages
+        # Amplitudes that map to the same ASF drive the same RF, so repeats
+        # reuse the last reading instead of running the kernel again.
+        self._photodiode_v_for_asf = functools.lru_cache(maxsize=64)(self._measure_asf)
+        # Compiled once; requested_asf() hands each call its ASF.
+        self._asf = 0
+        self._measure_requested_mu = self.core.precompile(self._measure_requested)
 
     def _ensure_devices_present(self) -> None:
         missing = [name for name in ("core", "urukul0_cpld", "urukul0_dds", "suservo0") if not hasattr(self, name)]
@@ -71,35 +85,59 @@ class UrukulSamplerPowerBOExperiment(ConfigurableBOExperiment):
 
         self.urukul0_cpld.init()
         self.urukul0_dds.init()
+        # Manual OSK: output amplitude comes from the ASF register, so trials
+        # only rewrite that one register. Frequency and phase are set here once.
+        self.urukul0_dds.set_cfr1(osk_enable=1)
+        self.urukul0_dds.set_asf(0)
+        self.urukul0_dds.set_mu(self._ftw, pow_=self._pow)
         self.urukul0_dds.sw.off()
-        delay(1 * ms)
+        delay_mu(self._dds_init_mu)
 
         self.suservo0.init()
-        delay(5 * ms)
+        delay_mu(self._servo_init_mu)
         self.suservo0.set_pgia_mu(self.adc_channel, 0)
-        delay(100 * us)
+        delay_mu(self._pgia_mu)
 
     @kernel
-    def measure_photodiode_voltage(self, amplitude: float) -> float:
+    def measure_photodiode_mu(self, asf: int) -> int:
+        """Sum of adc_averages signed ADC codes read at the servo cycle rate."""
         self.core.break_realtime()
 
-        if amplitude < 0.0:
-            amplitude = 0.0
-        if amplitude > 1.0:
-            amplitude = 1.0
-
-        self.urukul0_dds.set(self.rf_frequency_hz, phase=self.rf_phase_turns, amplitude=amplitude)
+        self.urukul0_dds.set_asf(asf)
+        self.urukul0_cpld.io_update.pulse_mu(8)
         self.urukul0_dds.sw.on()
-        delay(self.settle_time_ms * ms)
+        delay_mu(self._settle_mu)
+
+        # Integer accumulation; the (linear) conversion to volts is done once
+        # on the host. 1024 averages of 16-bit codes fit easily in int32.
+        total_mu = 0
+        for _ in range(self.adc_averages):
+            # Same decoding as SUServo.get_adc(): a 16-bit two's complement
+            # code above the LSB of the state memory word.
+            code = (self.suservo0.get_adc_mu(self.adc_channel) >> 1) & 0xFFFF
+            total_mu += code - ((code & 0x8000) << 1)
+            delay_mu(self._sample_spacing_mu)
+        return total_mu
+
+    @kernel
+    def _measure_requested(self) -> int:
+        return self.measure_photodiode_mu(self.requested_asf())
+
+    def requested_asf(self) -> int:
+        return self._asf
+
+    @staticmethod
+    def _asf_for(amplitude: float) -> int:
+        return round(min(1.0, max(0.0, amplitude)) * ASF_MAX)
+
+    def measure_photodiode_voltage(self, amplitude: float) -> float:
+        return self._measure_asf(self._asf_for(amplitude))
 
-        total_v = 0.0
-        n = int(self.adc_averages)
-        i = 0
-        while i < n:
-            total_v += self.suservo0.get_adc(self.adc_channel)
-            delay(20 * us)
-            i += 1
-        return total_v / n
+    def _measure_asf(self, asf: int) -> float:
+        self._asf = asf
+        total_mu = self._measure_requested_mu()
+        # PGIA gain code 0, set in init_hardware().
+        return adc_mu_to_volt(total_mu, corrected_fs=self.suservo0.corrected_fs) * self._inv_n
 
     def setup_bo_run(self) -> None:
         self._ensure_devices_present()
@@ -107,23 +145,21 @@ class UrukulSamplerPowerBOExperiment(ConfigurableBOExperiment):
 
     def _voltage_to_power_nw(self, voltage_v: float) -> float:
         # Linear photodiode calibration model.
-        return (voltage_v - float(self.pd_voltage_offset_v)) * float(self.pd_voltage_to_nw_gain)
+        return (voltage_v - self.pd_voltage_offset_v) * self.pd_voltage_to_nw_gain
 
     def evaluate(self, params: dict[str, float]) -> float:
-        self._ensure_artiq()
         amplitude = float(params["urukul_amplitude"])
-        photodiode_v = float(self.measure_photodiode_voltage(amplitude))
+        photodiode_v = self._photodiode_v_for_asf(self._asf_for(amplitude))
         self._last_metric_name = "voltage_v"
         self._last_metric_value = photodiode_v
         power_nw = self._voltage_to_power_nw(photodiode_v)
-        error = power_nw - float(self.target_power_nw)
+        error = power_nw - self.target_power_nw
         return -(error * error)
 
     def evaluate_and_record(self, amplitude: float) -> PowerMeasurement:
-        self._ensure_artiq()
-        photodiode_v = float(self.measure_photodiode_voltage(float(amplitude)))
+        photodiode_v = self.measure_photodiode_voltage(float(amplitude))
         power_nw = self._voltage_to_power_nw(photodiode_v)
-        error = power_nw - float(self.target_power_nw)
+        error = power_nw - self.target_power_nw
         return PowerMeasurement(
             amplitude=float(amplitude),
             photodiode_v=photodiode_v,
@@ -1,5 +1,4 @@
 from artiq.experiment import *
-import numpy as np
 
 class DACandADCTest(EnvExperiment):
     def build(self):
@@ -11,8 +10,7 @@ class DACandADCTest(EnvExperiment):
         self.setattr_argument("test_voltage", NumberValue(default=5.0, unit="V", min=-10.0, max=10.0))
     
     def prepare(self):
-        # self.smp = np.array([0.0] * 8)
-        self.smp = [0] * 8
+        self._data = [0, 0]   # minimal even length
     
     @kernel
     def run(self):
@@ -22,15 +20,18 @@ class DACandADCTest(EnvExperiment):
         self.core.break_realtime()
         delay(10*ms)
 
-        for i in range(8):
-            self.sampler0.set_gain_mu(i, 0)
+        self._set_all_gains_zero()
 
         self.core.break_realtime()
 
-        data = [0, 0]   # minimal even length
-        self.sampler0.sample_mu(data)
+        self.sampler0.sample_mu(self._data)
 
-        print(data)
+        print(self._data)
+
+    @kernel
+    def _set_all_gains_zero(self):
+        # One PGIA register write covers all 8 channels (2 gain bits each).
+        self.sampler0.set_pgia_mu(0)
 
     # @kernel
     # def run(self):
@@ -0,0 +1,39 @@
+"""Regression tests for the BO core in src/main.py."""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import main  # noqa: E402
+
+
+class Quadratic1D:
+    def parameter_space(self):
+        return [main.Parameter("x", (-1.0, 1.0))]
+
+    def evaluate(self, params):
+        return -((params["x"] - 0.3) ** 2)
+
+
+class MaternGPFitTest(unittest.TestCase):
+    def test_quadratic_does_not_collapse_to_white_noise(self):
+        # With seed 123 the first likelihood fit used to stop at a length
+        # scale of ~3e-5, and BO then walked the grid from the lower bound.
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = main.run(Quadratic1D(), max_trials=25, seed=123)
+        self.assertAlmostEqual(best["params"]["x"], 0.3, delta=0.01)
+
+    def test_fitted_length_scale_not_below_point_spacing(self):
+        X = main.latin_hypercube(5, 1, main.np.random.default_rng(123))
+        y = -((X[:, 0] * 2.0 - 1.0 - 0.3) ** 2)
+        gp = main.MaternGP()
+        gp.fit(X, y)
+        self.assertGreater(gp.length_scale, main.np.diff(main.np.sort(X[:, 0])).min())
+
+
+if __name__ == "__main__":
+    unittest.main()